@@ -1,183 +1,446 @@
 import sys
 import re
-from itertools import product
+import hashlib
+import importlib.util
+import os
+import pickle
+import stat
+from pathlib import Path
+import numpy as np
+# numba is optional, and only imported by load_run_program when a truth table is large enough to pay for it
+HAS_NUMBA = importlib.util.find_spec('numba') is not None
+numba = None
 
-def check_valid_recursively(expr, declared_vars, declared_ids):
+CONSTS = frozenset(('True', 'False'))
+OPS = frozenset(('and', 'or', 'not'))
+BINARY_OPS = frozenset(('and', 'or'))
+# Words with a meaning within expressions, which cannot be shown
+EXPR_KEYWORDS = frozenset(('(', ')')) | OPS | CONSTS
+# Words that cannot be used as variable names
+RESERVED = EXPR_KEYWORDS | frozenset(('var', 'show', 'show_ones', '='))
+
+# Tokenization rules, compiled once (see Compiler._tokenize)
+COMMENT_RE = re.compile(r'#[^\n]*')    # anything on a line after the character “#” is ignored
+INVALID_RE = re.compile(r'(?P<digit>(?<![A-Za-z_0-9])[0-9])'     # a word starting with a digit
+                        r'|(?P<invalid>[^A-Za-z_0-9()=; \t\n\r])'  # anything else but blanks
+                        )
+TOKEN_RE = re.compile(r'[A-Za-z_][A-Za-z_0-9]*|[()=;]')   # words and special chars
+
+def group_parens(expr):
     """
     
-    Check the validity of an expression by iteratively check sub-expressions.
+    Nests the tokens of an expression by parentheses with a single left-to-right pass:
+    each parenthesized sub-expression becomes a list within its parent,
+    e.g., ['a', 'and', '(', 'b', 'or', 'c', ')'] --> ['a', 'and', ['b', 'or', 'c']].
     
     """
-    def check_valid(expr, declared_vars, declared_ids):
+    group = []
+    stack = []     # the enclosing groups
+    for i, token in enumerate(expr):
+        if token == '(':
+            stack.append(group)
+            group = []
+        elif token == ')':
+            if stack == []:
+                raise Exception(f'Unmatched closing parenthesis at position {i} in <{expr}>')
+            sub_expr = group
+            group = stack.pop()
+            group.append(sub_expr)
+        else:
+            group.append(token)
+    if stack != []:
+        raise Exception(f'Unbalanced parentheses in <{expr}>')
+    return group
+
+# Opcodes of the nodes in the programs run by run_program
+VAR, CONST, AND, OR, NOT = range(5)
+
+class Node:
+    def __init__(self,
+                 value=None,
+                 children=None):
+        self.value = value
+        self.children = children if children else []
+        # children are always built first, so their depth is already known
+        self._depth = 0 if self.children == [] else 1 + min(child._depth for child in self.children)
+        # name of the node's column in the truth table, set by hashcons for the other nodes
+        self.name = 'v_' + value if self.children == [] else None
+    
+    def to_source(self):
+        """
+        
+        Returns the node as a Python expression over the bit-packed truth-table columns of its children
+        (see lower_to_source): and/or/not become the bitwise &, |, ~
+        and each child is read from the column named after it (see hashcons).
+        
+        """
+        return self.name
+
+    def _join_children(self, op):
+        # Group the operands as a balanced tree, so long chains do not nest too deep for compile()
+        def join(sources):
+            if len(sources) == 1:
+                return sources[0]
+            mid = len(sources) // 2
+            return '(' + join(sources[:mid]) + op + join(sources[mid:]) + ')'
+        
+        return join([child.name for child in self.children])
+
+    def __repr__(self) -> str:
+        return f'<Node> \'{self.value}\' with {len(self.children)} children'
+
+    def depth(self):
+        return self._depth
+
+class AndNode(Node):
+    opcode = AND
+    
+    def __init__(self,
+                 children=None):
+        super().__init__('and', children)
+        if len(self.children) < 2:
+            raise Exception(f'Invalid number of children in {self}')
+    
+    def to_source(self):
+        return self._join_children(' & ')
+
+class OrNode(Node):
+    opcode = OR
+    
+    def __init__(self,
+                 children=None):
+        super().__init__('or', children)
+        if len(self.children) < 2:
+            raise Exception(f'Invalid number of children in {self}')
+    
+    def to_source(self):
+        return self._join_children(' | ')
+
+class NotNode(Node):
+    opcode = NOT
+    
+    def __init__(self,
+                 children=None):
+        super().__init__('not', children)
+        if len(self.children) < 1:
+            raise Exception(f'Invalid number of children in {self}')
+    
+    def to_source(self):
+        return '(~' + self.children[0].name + ')'
+
+class VarNode(Node):
+    opcode = VAR
+    
+    def __init__(self,
+                 value=None,
+                 index=None):
+        super().__init__(value)
+        self.index = index  # position of the variable among the declared ones, set by hashcons
+
+class ConstNode(Node):
+    opcode = CONST
+    
+    def __init__(self,
+                 value=None):
+        super().__init__(value)
+        self.val = value == 'True'
+
+# Node class of each operator
+OPERATORS = {'and': AndNode, 'or': OrNode, 'not': NotNode}
+
+# MASKS[s] --> bit j is set iff bit s of j is set, for j in 0..63
+MASKS = np.array([0xAAAAAAAAAAAAAAAA,
+                  0xCCCCCCCCCCCCCCCC,
+                  0xF0F0F0F0F0F0F0F0,
+                  0xFF00FF00FF00FF00,
+                  0xFFFF0000FFFF0000,
+                  0xFFFFFFFF00000000], dtype=np.uint64)
+
+def pattern_column(k, n):
+    """
+    
+    Returns the values taken by the k-th of n variables over the whole truth table,
+    rows being ordered as in itertools.product (the first variable is the most significant bit).
+    The column is bit-packed: row i is stored in bit i % 64 of word i // 64.
+    
+    """
+    s = n - k - 1   # the variable is bit s of the row index
+    words = max(1, 2**n // 64)
+    if s < 6:
+        return np.full(words, MASKS[s], dtype=np.uint64)
+    return np.tile(np.repeat(np.array([0, 2**64 - 1], dtype=np.uint64), 2**(s - 6)), words // 2**(s - 5))
+
+def hashcons(node, table, ids, vars_index):
+    """
+    
+    Returns the shared copy of a tree, so that identical sub-expressions (across all identifiers) are evaluated once.
+    Identifiers used within the tree are replaced by their own (already shared) tree.
+    
+    table:
+        <dict>:
+            the shared nodes built so far, by key. Updated with the new ones.
+    ids:
+        <dict>:
+            the identifiers assigned so far and their shared trees.
+    vars_index:
+        <dict>:
+            the position of each declared variable, stored in its VarNode.
+    
+    """
+    if node.children == []:
+        if node.value in ids:
+            return ids[node.value]
+        key = (node.value,)
+    else:
+        children = [hashcons(child, table, ids, vars_index) for child in node.children]
+        if node.value in BINARY_OPS:
+            # x and x --> x, same for or
+            children = list(dict.fromkeys(children))
+            if len(children) == 1:
+                return children[0]
+        names = [child.name for child in children]
+        # and / or are commutative
+        key = (node.value, tuple(sorted(names)) if node.value in BINARY_OPS else tuple(names))
+    
+    if key not in table:
+        if node.children == []:
+            shared = node
+            if isinstance(shared, VarNode):
+                shared.index = vars_index[shared.value]
+        else:
+            shared = type(node)(children)
+            shared.name = f't{len(table)}'
+        table[key] = shared
+    return table[key]
+
+def lower_to_source(order, names):
+    """
+    
+    Lowers the nodes in order (children first) to a straight-line Python program over the bit-packed columns,
+    assigning each node once to its name. Each column is deleted as soon as its last parent has been computed,
+    unless it is one of names.
+    
+    """
+    uses = {}   # number of parents still to be computed, for each node
+    for node in order:
+        for child in node.children:
+            uses[id(child)] = uses.get(id(child), 0) + 1
+    
+    lines = []
+    for node in order:
+        if node.children == []:
+            continue
+        lines.append(f'{node.name} = {node.to_source()}')
+        for child in node.children:
+            uses[id(child)] -= 1
+            if (uses[id(child)] == 0) and (child.children != []) and (child.name not in names):
+                lines.append(f'del {child.name}')
+    return '\n'.join(lines)
+
+def topological_order(roots):
+    """
+    
+    Returns all the nodes reachable from roots, each one once and after all of its children.
+    Walks the DAG with an explicit stack, since chains of ids can be arbitrarily deep.
+    
+    """
+    order = []
+    seen = set()
+    for root in roots:
+        stack = [(root, False)]
+        while stack:
+            node, expanded = stack.pop()
+            if expanded:
+                order.append(node)
+                continue
+            if id(node) in seen:
+                continue
+            seen.add(id(node))
+            stack.append((node, True))
+            for child in reversed(node.children):
+                if id(child) not in seen:
+                    stack.append((child, False))
+    return order
+
+def build_program(vars, order, roots):
+    """
+    
+    Lowers the nodes in order (children first) to a flat program for run_program.
+    Node k of the program has opcode ops[k] and is computed from params[k] (the bit of the row index
+    for a variable, the value for a constant) or from its children, the nodes args[starts[k]:starts[k + 1]].
+    The program outputs the columns of roots.
+    
+    """
+    n = len(vars)
+    slot = {}
+    ops, params, starts, args = [], [], [0], []
+    for k, node in enumerate(order):
+        slot[id(node)] = k
+        ops.append(node.opcode)
+        if node.opcode == VAR:
+            params.append(n - node.index - 1)   # see pattern_column
+        elif node.opcode == CONST:
+            params.append(int(node.val))
+        else:
+            params.append(0)
+        args.extend(slot[id(child)] for child in node.children)
+        starts.append(len(args))
+    outputs = [slot[id(root)] for root in roots]
+    
+    return tuple(np.array(a, dtype=np.int64) for a in (ops, params, starts, args, outputs))
+
+BLOCK = 64      # words of the truth table evaluated together by run_program
+CHUNK = 2**16   # rows of the truth table formatted and printed together by Compiler._show
+
+NUMBA_WORK = 2**27    # nodes x words of a truth table from which run_program pays for importing numba
+
+_run_program = None
+
+def load_run_program():
+    """
+    
+    Returns run_program (see below), importing numba and defining the kernel on first use, or None without numba.
+    The compiled kernel itself is loaded from numba's on-disk cache.
+    
+    """
+    global numba, _run_program
+    if _run_program is None and HAS_NUMBA:
+        import numba
+        
+        @numba.njit(parallel=True, cache=True)
+        def run_program(ops, params, starts, args, outputs, out):
+            """
+            
+            Runs a program (see build_program) over the bit-packed truth table, filling out[w, j] with word w of output j.
+            The table is split in blocks of words, spread across cores: within a block every node is computed once,
+            children first, and kept in a small scratch buffer instead of a whole column.
+            
+            """
+            words = out.shape[0]
+            for b in numba.prange((words + BLOCK - 1) // BLOCK):
+                lo = b * BLOCK
+                hi = min(lo + BLOCK, words)
+                reg = np.empty((len(ops), hi - lo), dtype=np.uint64)
+                for k in range(len(ops)):
+                    op = ops[k]
+                    if op == VAR:
+                        s = params[k]
+                        for w in range(lo, hi):
+                            if s < 6:
+                                reg[k, w - lo] = MASKS[s]
+                            else:
+                                reg[k, w - lo] = ((np.uint64(w) >> np.uint64(s - 6)) & np.uint64(1)) * np.uint64(0xFFFFFFFFFFFFFFFF)
+                    elif op == CONST:
+                        reg[k, :] = np.uint64(params[k]) * np.uint64(0xFFFFFFFFFFFFFFFF)
+                    elif op == NOT:
+                        reg[k, :] = ~reg[args[starts[k]], :]
+                    else:
+                        reg[k, :] = reg[args[starts[k]], :]
+                        for j in range(starts[k] + 1, starts[k + 1]):
+                            if op == AND:
+                                reg[k, :] &= reg[args[j], :]
+                            else:
+                                reg[k, :] |= reg[args[j], :]
+                for j in range(len(outputs)):
+                    out[lo:hi, j] = reg[outputs[j], :]
+        
+        _run_program = run_program
+    return _run_program
+
 
-        i = 0
+def build_tree_recursively(expr, declared_vars, declared_ids):
+    """
+    
+    Builds the tree of an expression, checking its validity along the way.
+    declared_vars and declared_ids are sets, for constant-time lookups.
+    
+    """
+    def build_tree(expr, declared_vars, declared_ids):
+        # expr is nested by parentheses (see group_parens)
+
+        children = []
+        node_type = None    # not and or
         running = -1   # -1:begin expr, 0: var, 1: and/or, 2: not
-        clause = None    # not and or
-        while i < len(expr):
-            token = expr[i]
-            # OPEN parens --> look for matching closing parens
-            if token == '(':
+        for i, token in enumerate(expr):
+            
+            # PARENS --> solve the sub-expr within them
+            if isinstance(token, list):
                 if running == 0:
                     raise Exception(f'Invalid assignment {expr}')
-                open_parens = 1
-                for j in range(i + 1, len(expr)):
-                    if expr[j] == '(':
-                        open_parens += 1
-                    elif expr[j] == ')':
-                        open_parens -= 1
-                    if open_parens == 0:
-                        # Solve the sub-expr within the parentheses
-                        if expr[i + 1:j] == []:
-                            raise Exception(f'Empty parentheses at position {i} in <{expr}>')
-                        check_valid(expr[i + 1:j], declared_vars, declared_ids)
-                        running = 0 # subexpr as if it were a variable
-                        i = j  # Move the index to the closing ')'
-                        break
-                if open_parens > 0:
-                    raise Exception(f'Unbalanced parentheses in <{expr}>')
-            
-            # CLOSING parens
-            elif token == ')':
-                raise Exception(f'Unmatched closing parenthesis at position {i} in <{expr}>')
+                if token == []:
+                    raise Exception(f'Empty parentheses at position {i} in <{expr}>')
+                node = build_tree(token, declared_vars, declared_ids)
+                children.append(node)
+                running = 0 # subexpr as if it were a variable
             
             # IDENTIFIER / VARIABLE
-            elif (expr[i] in declared_vars) or (expr[i] in declared_ids) or (expr[i] in ('True', 'False')):
+            elif (token in declared_vars) or (token in declared_ids) or (token in CONSTS):
                 if running == 0:
                     raise Exception(f'Invalid syntax at position {i} in <{expr}>')
+                children.append(ConstNode(token) if token in CONSTS else VarNode(token))
                 running = 0
             
             # NOT
             elif token == 'not':
                 if running != -1:
                     raise Exception(f'Invalid syntax at position {i} in <{expr}>')
-                if (clause is not None) and (clause != token):
-                    raise Exception(f'Conflicts of operators in <{expr}>') 
-                clause = token
+                node_type = token
                 running = 2
             
             # AND / OR
-            elif token in ('and', 'or'):
+            elif token in BINARY_OPS:
                 if running != 0:
                     raise Exception(f'Invalid syntax at position {i} in <{expr}>')
-                if (clause is not None) and (clause != token):
+                if (node_type is not None) and (node_type != token):
                     raise Exception(f'Conflicts of operators in <{expr}>')
-                clause = token
-                running = 1 
+                node_type = token
+                running = 1
             
             else:
                 raise Exception(f'Invalid token {token} at position {i} in <{expr}>')
-                
-            i += 1
+        
         if running > 0:
             raise Exception(f'Invalid assignment {expr}')
         
-        return 
-    
-    return check_valid(expr, declared_vars, declared_ids)
-
-class Node:
-    def __init__(self,
-                 value=None,
-                 children=None):
-        self.value = value
-        self.children = children if children else []
-        self._depth = None
-    
-    def eval(self, variables):
-
-        if self.value == 'and':
-            if len(self.children) < 2:
-                raise Exception(f'Invalid number of children in {self}')
-            for child in self.children:
-                if not child.eval(variables):
-                    return False
-            return True
-        
-        elif self.value == 'or':
-            if len(self.children) < 2:
-                raise Exception(f'Invalid number of children in {self}')
-            for child in self.children:
-                if child.eval(variables):
-                    return True
-            return False
-        
-        elif self.value == 'not':
-            if len(self.children) < 1:
-                raise Exception(f'Invalid number of children in {self}')
-            return not self.children[0].eval(variables)
-        
-        elif self.value == 'True':
-            return True
+        # (x and y) and z --> x and y and z, same for or
+        if node_type in BINARY_OPS:
+            flat = []
+            for child in children:
+                if isinstance(child, OPERATORS[node_type]):
+                    flat.extend(child.children)
+                else:
+                    flat.append(child)
+            children = flat
         
-        elif self.value == 'False':
-            return False
+        # not (not x) --> x
+        if node_type == 'not' and isinstance(children[0], NotNode):
+            return children[0].children[0]
         
-        else:
-            return variables[self.value]
-
-    def __repr__(self) -> str:
-        return f'<Node> \'{self.value}\' with {len(self.children)} children'
-
-    def depth(self):
-        if self._depth is None:
-            self._depth = 0 if self.children == [] else 1 + min(self.children, key=lambda x: x.depth()).depth() 
-        return self._depth
-
-def build_tree_recursively(expr):
-    
-    def build_tree(expr):
-
-        children = []
-        node_type = None
-        i = 0
-        while i < len(expr):
-            token = expr[i]
-            
-            if token == '(':
-                # Find the matching closing parenthesis
-                open_parens = 1
-                for j in range(i + 1, len(expr)):
-                    if expr[j] == '(':
-                        open_parens += 1
-                    elif expr[j] == ')':
-                        open_parens -= 1
-                    if open_parens == 0:
-                        # Solve the sub-expr within the parentheses
-                        if expr[i + 1:j] == []:
-                            raise Exception(f'Empty parentheses at position {i} in <{expr}>')
-                        node = build_tree(expr[i + 1:j])
-                        children.append(node)
-                        i = j  # Move the index to after the closing ')'
-                        break
-            elif token == ')':
-                raise Exception(f'Unmatched closing parenthesis at position {i} in <{expr}>')
-            
-            elif token in ('not', 'and', 'or'):
-                if (node_type is not None) and (node_type != token):
-                    raise Exception(f'Conflicts of operators in <{expr}>') 
-                node_type = token if node_type is None else node_type
-            else:
-                children.append(Node(token))
-            i += 1
-        
-        children = sorted(children, key=lambda x: x.depth())
+        children = sorted(children, key=lambda x: x._depth)
         if node_type is not None:
-            node = Node(node_type, children)
+            node = OPERATORS[node_type](children)
         else:
             node = children[0]
         
         return node
     
-    tree = build_tree(expr)
+    tree = build_tree(group_parens(expr), declared_vars, declared_ids)
     return tree
 
 class Compiler():
+
+    # Checked instructions of the inputs compiled so far, by hash of the input (see compile).
+    # The directory is private to the user, since loading a pickle can run arbitrary code
+    _cache_dir = Path(os.environ.get('XDG_CACHE_HOME') or os.path.expanduser('~/.cache')) / 'boolcompile'
+    _cache_size = 64    # entries kept in the cache, the least recently used ones are evicted
     
     def __init__(self,
                  )->None:    
         
-        self.vars = []      # variables declared so far
+        self.vars = []      # variables declared so far, in order of declaration
+        self._vars_index = {}   # position of each variable in self.vars, for constant-time lookups
         self.ids = {}       # identifiers and their boolean expressions assigned so far
+        self._nodes = {}    # the nodes shared by all identifiers (see hashcons)
 
         return
 
@@ -199,42 +462,19 @@ class Compiler():
         Returns a list of tokens, i.e., a <list> of <str>
 
         '''
-        # 1.    Anything on a line after the character “#” is ignored.
-        s = re.sub(pattern = r"#.*\n",
-                   repl = "",
-                   string=s
-                   )
-        tokens = []
-        word = ''
-        for char in s:
-
-            # WORDS -- > starts with a letter or an underscore (no digits)
-            if re.match(r'[A-Za-z_]', char) and not word:   
-                word += char
-            elif re.match(r'[0-9]', char) and not word:
+        s = COMMENT_RE.sub('', s)
+        
+        # The first invalid character, if any
+        m = INVALID_RE.search(s)
+        if m is not None:
+            if m.lastgroup == 'digit':
                 raise Exception('Invalid word starting with a digit')
-            
-            # WORDS --> any sequence of (one or more) consecutive letters, digits, or underscores
-            elif re.match(r'[A-Za-z_0-9]', char) and word:
-                word += char
-            
-            # BLANKS --> spaces, tabs, carriage, newlines mark the end of a word or are ingored
-            elif re.match(r'[ \t\n\r]', char):   # [\s] == [\t\n\r' ']
-                if word:  
-                    tokens.append(word)
-                    word = ''
-            
-            # SPECIAL chars
-            elif re.match(r'[()=;]', char):
-                if word:    # special char ends a word
-                    tokens.append(word)
-                    word = ''
-                tokens.append(char)
-            
-            # Anything else
-            else:
-                raise Exception(f'Invalid character: {char}')
+            raise Exception(f'Invalid character: {m.group()}')
         
+        # WORDS --> starts with a letter or an underscore, followed by letters, digits, or underscores
+        # SPECIAL chars --> each one is a token on its own
+        # BLANKS are ignored
+        tokens = TOKEN_RE.findall(s)
 
         if verbose:
             print(f'Tokenized Input:\n\n{tokens}\n\n')
@@ -278,11 +518,13 @@ class Compiler():
         """
         
         Checks the validity of a list of instructions.
+        The expression of each assignment is replaced by its tree, built while checking it.
         
         """
 
-        declared_vars = []
-        declared_ids = []
+        declared_vars = set()
+        declared_ids = set()
+        checked = []
         for instr in instructions:
             
             if verbose:
@@ -297,9 +539,9 @@ class Compiler():
                 for t in instr[1:]:
                     if (t in declared_vars) or (t in declared_ids):
                         raise Exception(f"Variable already declared: {t}")
-                    if (t in ('(', ')', 'and', 'or', 'not', 'True', 'False', 'var', 'show', 'show_ones', '=')):
+                    if t in RESERVED:
                         raise Exception(f"Invalid variable name: {t}")
-                    declared_vars.append(t)
+                    declared_vars.add(t)
                     if len(declared_vars) > 64:
                         raise Exception(f"Too many variables declared: {declared_vars}")
             
@@ -307,19 +549,22 @@ class Compiler():
             elif (len(instr) >= 3) and (instr[1] == '='):
                 if (instr[0] in declared_vars) or (instr[0] in declared_ids):
                     raise Exception(f" already declared: {instr[0]}")
-                check_valid_recursively(instr[2:], declared_vars, declared_ids)
-                declared_ids.append(instr[0])
+                tree = build_tree_recursively(instr[2:], declared_vars, declared_ids)
+                declared_ids.add(instr[0])
+                instr = [instr[0], '=', tree]
             
             # SHOW
             elif (instr[0] == 'show') or (instr[0] == 'show_ones'):
                 for t in instr[1:]:
-                    if ((t not in declared_ids) and (t not in declared_vars)) or (t in ('(', ')', 'and', 'or', 'not', 'True', 'False')):
+                    if ((t not in declared_ids) and (t not in declared_vars)) or (t in EXPR_KEYWORDS):
                         raise Exception(f"Unknown identifier: {t}")
             
             else:
                 raise Exception(f'Invalid instruction: {instr}')
+            
+            checked.append(instr)
 
-        return instructions
+        return checked
     
     def _execute_instructions(self,
                               instructions: list=None,
@@ -350,15 +595,16 @@ class Compiler():
                 for t in i[1:]:
                     if t == ';':
                         break
+                    self._vars_index[t] = len(self.vars)
                     self.vars.append(t)
             
-            # ASSIGNMENT -> store in self.ids as {'z': ['x', 'and', 'y']}
+            # ASSIGNMENT -> store in self.ids as {'z': <Node> 'and' with 2 children}
             elif i[1] == '=':
                 # re_evaluate = True  # re-evaluate all ids after an assignment
                 if verbose:
                     print(f'Assignment: {i}')
-                if (i[0] not in self.vars) and (i[0] not in self.ids):
-                    self.ids[i[0]] = build_tree_recursively(i[2:])
+                if (i[0] not in self._vars_index) and (i[0] not in self.ids):
+                    self.ids[i[0]] = hashcons(i[2], self._nodes, self.ids, self._vars_index)
                 else:
                     raise Exception(f"{i[0]} already exists.")
             
@@ -375,6 +621,26 @@ class Compiler():
             else:   
                 raise Exception(f"Invalid instruction: {i}")
     
+    def _eval_columns(self,
+                      words: int=None,
+                      order: list=None,
+                      names: list=None
+                      )->list:
+        """
+        
+        Evaluates the nodes in order (children first) over the bit-packed truth table with numpy,
+        each distinct sub-expression once, and returns the columns called names.
+        Used for small truth tables, or when numba is not available (see load_run_program).
+        
+        """
+        n = len(self.vars)
+        env = {'v_True': np.full(words, ~np.uint64(0)), 'v_False': np.zeros(words, dtype=np.uint64)}
+        env.update({'v_' + v: pattern_column(k, n) for k, v in enumerate(self.vars)})
+
+        # The whole DAG runs as a single code object: one numpy call per node, no per-row loop
+        exec(compile(lower_to_source(order, names), '<show>', 'exec'), env)
+        return [env[name] for name in names]
+    
     def _show(self,
               ids_to_show: list=None,
               show_ones: bool=False
@@ -393,41 +659,150 @@ class Compiler():
         """
         
         
-        print('#' + ' ' + ' '.join(self.vars) + '   ' + ' '.join(ids_to_show))
+        header = ('#' + ' ' + ' '.join(self.vars) + '   ' + ' '.join(ids_to_show) + '\n').encode()
+        
+        n = len(self.vars)
+        words = max(1, 2**n // 64)
+        roots = [self.ids[id] if id in self.ids else VarNode(id, self._vars_index[id]) for id in ids_to_show]
+        order = topological_order(roots)
         
-        vars_value = list(product([False, True], repeat=len(self.vars)))
-        n = len(self.vars)   
-        i = 0
-        while i < 2**n:
-            vars = dict(zip(self.vars, vars_value[i]))
-            row = ' '
-            valid_row = not show_ones
-            for v in vars:
-                row += ' 1' if vars[v] == True else ' 0'
-            row += '  '
-            # cache = {}
+        # Evaluate each distinct sub-expression of the ids once, over the whole truth table
+        # with numba above a given amount of work, since importing it takes longer than a small table
+        run_program = load_run_program() if len(order) * words >= NUMBA_WORK else None
+        if run_program is not None:
+            out = np.empty((words, len(roots)), dtype=np.uint64)
+            run_program(*build_program(self.vars, order, roots), out)
+            cols = [out[:, j] for j in range(len(roots))]
+        else:
+            cols = self._eval_columns(words, order, [root.name for root in roots])
 
-            # Evaluate the row for all ids
-            for id in self.ids.keys():
-                vars[id] = self.ids[id].eval(vars)
+        # Format the table by chunks of rows, each as a matrix of characters printed with a single write:
+        # each row is ' ', then ' 0' / ' 1' for each variable, '  ', ' 0' / ' 1' for each id, and '\n'.
+        # The digits are written straight into it, one column at a time, so memory stays bounded by the chunk
+        self._write(header)
+        k = len(cols)
+        chunk_words = max(1, CHUNK // 64)
+        for lo in range(0, words, chunk_words):
+            hi = min(lo + chunk_words, words)
             
-            # Print the ones requested
-            for id in ids_to_show:
-                row += ' 1' if vars[id] == True else ' 0'
-                
-                # if at least one id is True, the row is valid
-                if vars[id] and (not valid_row):
-                    valid_row = True
+            # Keep only the rows where at least one id is True, if required
+            if show_ones:
+                mask = cols[0][lo:hi].copy()
+                for c in cols[1:]:
+                    np.bitwise_or(mask, c[lo:hi], out=mask)
+                w = np.flatnonzero(mask)    # unpack only the words with at least one row set
+                bits = np.unpackbits(mask[w].astype('<u8').view(np.uint8), bitorder='little').reshape(-1, 64)
+                rows = ((lo + w)[:, None] * 64 + np.arange(64))[bits.astype(bool)]
+                rows = rows[rows < 2**n]    # with less than 6 variables, the word is not full
+            else:
+                rows = np.arange(lo * 64, min(hi * 64, 2**n))
             
-            # After completing the row
-            if valid_row:
-                print(row)
-            i += 1
+            # No row to format
+            if len(rows) == 0:
+                continue
+            
+            chars = np.full((len(rows), 2*n + 2*k + 4), ord(' '), dtype=np.uint8)
+            for j in range(n):
+                chars[:, 2 + 2*j] = ((rows >> (n - j - 1)) & 1).astype(np.uint8) + ord('0')
+            word = rows >> 6
+            shifts = (rows & 63).astype(np.uint64)
+            for j, c in enumerate(cols):
+                chars[:, 2*n + 4 + 2*j] = ((c[word] >> shifts) & 1).astype(np.uint8) + ord('0')
+            chars[:, -1] = ord('\n')
+            self._write(chars)
+        return
+    
+    def _write(self,
+               out: bytes=None
+               )->None:
+        """
+        
+        Writes the (ASCII) bytes out to the standard output in a single call, bypassing the text layer when possible.
+        out can be any bytes-like object, e.g., a contiguous uint8 array.
+        
+        """
+        if not hasattr(sys.stdout, 'buffer'):   # e.g., redirected to a StringIO
+            sys.stdout.write(bytes(out).decode())
+            return
+        sys.stdout.flush()  # anything printed before comes first
+        sys.stdout.buffer.write(out)
         return
         
+    def _private_cache_dir(self,
+                           )->Path:
+        """
+        
+        Returns the cache directory, creating it if needed, or None if it may have been written by another user:
+        it must be a directory owned by the current user, with no permissions for group and others.
+        
+        """
+        try:
+            self._cache_dir.mkdir(mode=0o700, parents=True, exist_ok=True)
+            st = self._cache_dir.lstat()
+        except OSError:
+            return None
+        if not stat.S_ISDIR(st.st_mode):
+            return None
+        if hasattr(os, 'getuid') and (st.st_uid != os.getuid() or st.st_mode & 0o077):
+            return None
+        return self._cache_dir
+    
+    def _load_cache(self,
+                    key: str=None
+                    )->list:
+        """
+        
+        Returns the checked instructions cached under key, or None if there are none.
+        
+        """
+        cache_dir = self._private_cache_dir()
+        if cache_dir is None:
+            return None
+        path = cache_dir / f'{key}.pkl'
+        try:
+            with open(path, 'rb') as cached:
+                instructions = pickle.load(cached)
+            os.utime(path)  # recently used, see _save_cache
+            return instructions
+        except Exception:   # missing or unreadable, compile from scratch
+            return None
+    
+    def _save_cache(self,
+                    key: str=None,
+                    instructions: list=None
+                    )->None:
+        """
+        
+        Caches the checked instructions under key, then evicts the least recently used entries
+        beyond the size of the cache.
+        
+        """
+        cache_dir = self._private_cache_dir()
+        if cache_dir is None:
+            return
+        path = cache_dir / f'{key}.pkl'
+        tmp = path.with_suffix(f'.{os.getpid()}.tmp')
+        try:
+            with open(tmp, 'wb') as cached:
+                pickle.dump(instructions, cached)
+            os.replace(tmp, path)   # never leave a partially written cache
+        except Exception:   # caching is best effort, e.g., too deep an expression to be pickled
+            return
+        finally:
+            tmp.unlink(missing_ok=True)
+        
+        try:
+            entries = sorted(cache_dir.glob('*.pkl'), key=lambda entry: entry.stat().st_mtime, reverse=True)
+            for entry in entries[self._cache_size:]:
+                entry.unlink(missing_ok=True)
+        except OSError:
+            pass
+        return
+    
     def compile(self,
                 f,
-                verbose=False
+                verbose=False,
+                cache=False
                 )->None:
         """
         
@@ -440,28 +815,47 @@ class Compiler():
         verbose:
             <bool>:
                 whether to print intermediate steps.
+        cache:
+            <bool>:
+                whether to reuse (and store) the checked instructions of a previous compilation of the same input,
+                skipping tokenization and parsing.
         
         """
         
         if verbose:
             print(f"Input:\n\n{f}\n\n")
         
-        tokens = self._tokenize(f,
-                                verbose=verbose
-                                )
-        instructions = self._split_instructions(tokens,
-                                                verbose=verbose
-                                                )
-        instructions = self._check_instructions(instructions,
-                                                verbose=verbose
-                                                )
+        instructions = None
+        if cache:
+            # The compiler's own source is part of the key, so that a change to it invalidates the cache
+            key = hashlib.sha256(Path(__file__).read_bytes() + f.encode()).hexdigest()
+            instructions = self._load_cache(key)
+        
+        if instructions is None:
+            tokens = self._tokenize(f,
+                                    verbose=verbose
+                                    )
+            instructions = self._split_instructions(tokens,
+                                                    verbose=verbose
+                                                    )
+            instructions = self._check_instructions(instructions,
+                                                    verbose=verbose
+                                                    )
+            if cache:
+                self._save_cache(key, instructions)
+        
+        elif verbose:
+            print(f'Loaded instructions from cache: {key}')
+        
         self._execute_instructions(instructions,
                                    verbose=verbose
                                    )
 
 
-with open(sys.argv[1], 'r') as f:
+# Usage: python table.py <path-to-input> [--no-cache]
+args = [a for a in sys.argv[1:] if a != '--no-cache']
+with open(args[0], 'r') as f:
 
     compiler = Compiler()    
     f = f.read()
-    compiler.compile(f, verbose=False)
\ No newline at end of file
+    compiler.compile(f, verbose=False, cache='--no-cache' not in sys.argv[1:])
\ No newline at end of file